@@ -1,12 +1,9 @@
-import os
 import asyncio
+import contextlib
+import itertools
 import azure.functions as func
 from dotenv import load_dotenv
-import pymongo
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
 import datetime
-from shared.key_vault_client import get_secret_client
 from shared.backend_client import BackendAPIClient
 import structlog
 from shared.logger_config import configure_logger
@@ -15,14 +12,118 @@ from shared.logger_config import configure_logger
 configure_logger()
 logger = structlog.get_logger()
 
+# Elements that never hold article text; dropped before extracting content
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'footer', 'header', 'aside']
+# Heuristics to find the main article text, tried in order
+CONTENT_SELECTORS = ['article', 'main', '.post-content', '.article-body', '#content']
+# Cap stored content to bound Cosmos DB document size and RU cost per write
+MAX_CONTENT_CHARS = 32_000
+SUMMARY_LINES = 15
+
+# Runs inside the page so only the extracted strings cross the CDP channel,
+# rather than the full HTML being serialised and re-parsed in Python.
+_EXTRACT_ARTICLE_JS = """
+([boilerplateTags, contentSelectors, maxChars]) => {
+    for (const el of document.querySelectorAll(boilerplateTags.join(','))) el.remove();
+    let text = '';
+    for (const selector of contentSelectors) {
+        const element = document.querySelector(selector);
+        if (element) {
+            text = element.innerText;
+            break;
+        }
+    }
+    if (!text.trim() && document.body) text = document.body.innerText; // Fallback to all text
+    return {title: document.title, text: text.slice(0, maxChars)};
+}
+"""
+
+def _iter_nonempty_lines(text: str):
+    """Yield stripped, non-empty lines lazily instead of materialising text.splitlines()."""
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        line = text[start:end].strip()
+        if line:
+            yield line
+        start = end + 1
+
+# One Chromium instance is shared by every message handled in this worker process;
+# each URL gets its own lightweight BrowserContext instead of a fresh browser.
+BROWSER_POOL_RECYCLE_AFTER = 100
+
+_playwright = None
+_browser = None
+_browser_uses = 0
+_active_contexts = 0
+_browser_lock = asyncio.Lock()
+
+def _on_browser_disconnected(browser) -> None:
+    global _browser
+    if _browser is browser:
+        logger.warning("Shared browser disconnected; it will be relaunched on next use.")
+        _browser = None
+
+async def _acquire_browser():
+    """Return the shared browser, launching or recycling it as needed."""
+    global _playwright, _browser, _browser_uses, _active_contexts
+    async with _browser_lock:
+        # Recycle periodically to keep Chromium's native memory in check, but only
+        # when no other message is still using the current instance.
+        if _browser is not None and _browser_uses >= BROWSER_POOL_RECYCLE_AFTER and _active_contexts == 0:
+            logger.info("Recycling shared browser", uses=_browser_uses)
+            browser, _browser = _browser, None
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning("Failed to close recycled browser", error=str(e))
+
+        if _browser is None:
+            if _playwright is None:
+                from playwright.async_api import async_playwright
+                _playwright = await async_playwright().start()
+            try:
+                _browser = await _playwright.chromium.launch()
+            except Exception:
+                # The Playwright driver connection may itself be dead; drop it so the
+                # next message starts a fresh driver instead of failing forever.
+                playwright, _playwright = _playwright, None
+                try:
+                    await playwright.stop()
+                except Exception as e:
+                    logger.warning("Failed to stop Playwright driver", error=str(e))
+                raise
+            _browser.on("disconnected", _on_browser_disconnected)
+            _browser_uses = 0
+
+        _browser_uses += 1
+        _active_contexts += 1
+        return _browser
+
+@contextlib.asynccontextmanager
+async def _new_page():
+    """Yield a page in a fresh BrowserContext on the shared browser, closing the context afterwards."""
+    global _active_contexts
+    browser = await _acquire_browser()
+    try:
+        context = await browser.new_context()
+        try:
+            yield await context.new_page()
+        finally:
+            await context.close()
+    finally:
+        _active_contexts -= 1
+
 async def main(msg: func.QueueMessage) -> None:
     """
     Worker function to crawl a single URL received from a queue message.
 
     This function is triggered by a message on the `crawling-tasks-queue`. It performs:
     1. Receives a URL to crawl.
-    2. Uses Playwright to launch a headless browser and fetch the page content.
-    3. Parses the HTML with BeautifulSoup to extract title and main text.
+    2. Uses a shared headless Playwright browser to fetch the page content.
+    3. Extracts the title and main text inside the browser.
     4. Saves the extracted content as a new document in the `articles` collection.
     """
     load_dotenv()
@@ -35,44 +136,30 @@ async def main(msg: func.QueueMessage) -> None:
     try:
 
         # --- 2. Crawl with Playwright ---
-        html_content = ""
-        async with async_playwright() as p:
-            try:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+        try:
+            async with _new_page() as page:
                 await page.goto(url, wait_until='domcontentloaded', timeout=60000) # 60s timeout
-                html_content = await page.content()
-                await browser.close()
-            except Exception as e:
-                logger.error("Playwright failed to get content", url=url, error=str(e))
-                # End execution if crawling fails; the message will be removed from the queue.
-                return
-
-        if not html_content:
-            logger.warning("No HTML content found.", url=url)
+                # --- 3. Extract title and main text in the page ---
+                extracted = await page.evaluate(
+                    _EXTRACT_ARTICLE_JS,
+                    [BOILERPLATE_TAGS, CONTENT_SELECTORS, MAX_CONTENT_CHARS]
+                )
+        except Exception as e:
+            logger.error("Playwright failed to get content", url=url, error=str(e))
+            # End execution if crawling fails; the message will be removed from the queue.
             return
 
-        # --- 3. Parse with BeautifulSoup ---
-        soup = BeautifulSoup(html_content, 'lxml')
-
-        title = soup.title.string if soup.title else "No Title Found"
-
-        # Heuristics to find the main article text
-        article_text = ""
-        for tag in ['article', 'main', '.post-content', '.article-body', '#content']:
-            element = soup.select_one(tag)
-            if element:
-                article_text = element.get_text(separator='\n', strip=True)
-                break
-        
+        article_text = (extracted.get('text') or '').strip()
         if not article_text:
-            article_text = soup.get_text(separator='\n', strip=True) # Fallback to all text
+            logger.warning("No text content found.", url=url)
+            return
 
-        summary = ' '.join(article_text.splitlines()[:15]) + '...' # Create a summary
+        title = (extracted.get('title') or '').strip() or "No Title Found"
+        summary = ' '.join(itertools.islice(_iter_nonempty_lines(article_text), SUMMARY_LINES)) + '...' # Create a summary
 
         # --- 4. Store Article via Backend API ---
         article_data = {
-            'title': title.strip(),
+            'title': title,
             'link': url,
             'summary': summary,
             'published': datetime.datetime.utcnow().isoformat(),
@@ -82,7 +169,9 @@ async def main(msg: func.QueueMessage) -> None:
         }
 
         try:
-            result = backend_client.create_article(article_data)
+            # The backend client uses blocking requests; run it off the event loop so other
+            # messages' crawls keep making progress while this one is written
+            result = await asyncio.to_thread(backend_client.create_article, article_data)
             if "created successfully" in result.get("message", ""):
                 logger.info("Article created via API", link=url, id=result.get("id"))
             else:
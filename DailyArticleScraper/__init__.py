@@ -1,13 +1,12 @@
-import os
-import feedparser
-import pymongo
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
+import requests
 import azure.functions as func
 from dotenv import load_dotenv
-from shared.key_vault_client import get_secret_client
+from shared.db_client import get_db, find_existing_links
 from shared.backend_client import BackendAPIClient
+from shared.feed_parser import ENTRY_FIELDS, parse_feed, feed_parse_executor
+from shared.tags import assign_tags
 import structlog
 from shared.logger_config import configure_logger
 
@@ -15,23 +14,23 @@ from shared.logger_config import configure_logger
 configure_logger()
 logger = structlog.get_logger()
 
-# Define a simple keyword-based tagging system
-TAG_KEYWORDS = {
-    "AI": ["ai", "artificial intelligence", "machine learning", "deep learning", "neural network"],
-    "Tech": ["technology", "software", "hardware", "startup", "innovation"],
-    "Science": ["science", "research", "discovery", "biology", "physics", "chemistry"],
-    "Business": ["business", "economy", "finance", "market", "investment"],
-    "Health": ["health", "medical", "medicine", "wellness", "fitness"],
-    "Environment": ["environment", "climate", "sustainability", "ecology"],
-}
-
-def assign_tags(title: str, summary: str) -> list[str]:
-    assigned_tags = []
-    content = (title + " " + summary).lower()
-    for tag, keywords in TAG_KEYWORDS.items():
-        if any(keyword in content for keyword in keywords):
-            assigned_tags.append(tag)
-    return assigned_tags
+# Feeds are downloaded concurrently before parsing; backend writes stay sequential
+FEED_FETCH_CONCURRENCY = 10
+FEED_FETCH_TIMEOUT_SECONDS = 30
+
+def _fetch_feed(feed_url: str) -> tuple[bytes, dict[str, str]]:
+    """
+    Download a feed so feedparser can parse it without doing its own blocking fetch.
+    Headers are returned too (keys lowercased, as feedparser looks them up) so the
+    Content-Type charset still reaches its encoding detection.
+    """
+    response = requests.get(
+        feed_url,
+        timeout=FEED_FETCH_TIMEOUT_SECONDS,
+        headers={"User-Agent": "UP2D8-DailyArticleScraper"}
+    )
+    response.raise_for_status()
+    return response.content, {key.lower(): value for key, value in response.headers.items()}
 
 def main(timer: func.TimerRequest) -> None:
     load_dotenv()
@@ -43,14 +42,10 @@ def main(timer: func.TimerRequest) -> None:
         # Initialize backend API client
         backend_client = BackendAPIClient()
 
-        # Get configuration from environment variables and Key Vault
-        secret_client = get_secret_client()
-        cosmos_db_connection_string = secret_client.get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8").value
-
-        # Connect to Cosmos DB (still needed for RSS feeds)
-        client = pymongo.MongoClient(cosmos_db_connection_string)
-        db = client.up2d8
+        # Cosmos DB is still read directly for RSS feeds and duplicate checks
+        db = get_db()
         rss_feeds_collection = db.rss_feeds
+        articles_collection = db.articles
 
         # Fetch RSS feeds from Cosmos DB
         rss_feeds = [feed['url'] for feed in rss_feeds_collection.find({})]
@@ -61,45 +56,95 @@ def main(timer: func.TimerRequest) -> None:
         new_articles_count = 0
         failed_articles_count = 0
         duplicate_articles_count = 0
+        # Links confirmed stored this run, so stories syndicated across feeds are checked once.
+        # A link whose POST failed stays out so a later feed carrying it can retry.
+        seen_links = set()
+
+        with ThreadPoolExecutor(max_workers=FEED_FETCH_CONCURRENCY) as executor:
+            feed_fetches = [(feed_url, executor.submit(_fetch_feed, feed_url)) for feed_url in rss_feeds]
+
+        fetched_feeds = []
+        for feed_url, feed_fetch in feed_fetches:
+            try:
+                fetched_feeds.append((feed_url, feed_fetch.result()))
+            except Exception as e:
+                logger.error('Error fetching feed', feed_url=feed_url, error=str(e))
+
+        with feed_parse_executor(len(fetched_feeds)) as executor:
+            feed_parses = [
+                (feed_url, executor.submit(parse_feed, body, headers))
+                for feed_url, (body, headers) in fetched_feeds
+            ]
 
-        for feed_url in rss_feeds:
-            logger.info('Parsing feed', feed_url=feed_url)
+        for feed_url, feed_parse in feed_parses:
+            logger.info('Processing feed', feed_url=feed_url)
             try:
-                feed = feedparser.parse(feed_url)
-                if feed.bozo:
-                    logger.warning('Malformed feed detected', feed_url=feed_url, bozo_exception=str(feed.bozo_exception))
+                feed = feed_parse.result()
+                if feed['bozo_exception'] is not None:
+                    logger.warning('Malformed feed detected', feed_url=feed_url, bozo_exception=feed['bozo_exception'])
                     continue
             except Exception as e:
                 logger.error('Error parsing feed', feed_url=feed_url, error=str(e))
                 continue
 
-            for entry in feed.entries:
+            # Build the whole feed first so known links can be filtered out with one query
+            feed_articles = []
+            queued_links = set()
+            for entry in feed['entries']:
                 try:
+                    missing_fields = [field for field in ENTRY_FIELDS if entry[field] is None]
+                    if missing_fields:
+                        raise ValueError(f"Entry is missing {', '.join(missing_fields)}")
+
+                    if entry['link'] in seen_links or entry['link'] in queued_links:
+                        duplicate_articles_count += 1
+                        continue
+                    queued_links.add(entry['link'])
+
                     # Assign tags to the article
-                    tags = assign_tags(entry.title, entry.summary)
+                    tags = assign_tags(entry['title'], entry['summary'])
 
-                    article_data = {
-                        'title': entry.title,
-                        'link': entry.link,
-                        'summary': entry.summary,
-                        'published': entry.published,
+                    feed_articles.append({
+                        'title': entry['title'],
+                        'link': entry['link'],
+                        'summary': entry['summary'],
+                        'published': entry['published'],
                         'tags': tags,
                         'source': 'rss'
-                    }
+                    })
+                except Exception as e:
+                    failed_articles_count += 1
+                    logger.error('Error processing article', link=entry.get('link'), error=str(e))
+
+            try:
+                existing_links = find_existing_links(articles_collection, [a['link'] for a in feed_articles])
+            except Exception as e:
+                # The backend still deduplicates, so fall back to posting everything
+                logger.warning('Existing link lookup failed', feed_url=feed_url, error=str(e))
+                existing_links = set()
+
+            for article_data in feed_articles:
+                if article_data['link'] in existing_links:
+                    seen_links.add(article_data['link'])
+                    duplicate_articles_count += 1
+                    continue
 
+                try:
                     # Use backend API instead of direct DB write
                     result = backend_client.create_article(article_data)
 
                     if "created successfully" in result.get("message", ""):
+                        seen_links.add(article_data['link'])
                         new_articles_count += 1
-                        logger.info("Article created via API", link=entry.link, id=result.get("id"))
+                        logger.info("Article created via API", link=article_data['link'], id=result.get("id"))
                     elif "already exists" in result.get("message", ""):
+                        seen_links.add(article_data['link'])
                         duplicate_articles_count += 1
-                        logger.debug("Article already exists", link=entry.link)
+                        logger.debug("Article already exists", link=article_data['link'])
 
                 except Exception as e:
                     failed_articles_count += 1
-                    logger.error('Error processing article', link=entry.link, error=str(e))
+                    logger.error('Error processing article', link=article_data['link'], error=str(e))
 
         # Calculate execution time
         execution_time = (datetime.now() - start_time).total_seconds()
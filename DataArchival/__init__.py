@@ -2,7 +2,7 @@ import azure.functions as func
 from datetime import datetime, timedelta, UTC
 import pymongo
 from dotenv import load_dotenv
-from shared.key_vault_client import get_secret_client
+from shared.db_client import get_db, BULK_OPERATION_TIMEOUT_SECONDS
 from shared.backend_client import BackendAPIClient
 import structlog
 from shared.logger_config import configure_logger
@@ -27,20 +27,17 @@ def main(timer: func.TimerRequest) -> None:
 
     try:
         # Initialize clients
-        secret_client = get_secret_client()
         backend_client = BackendAPIClient()
-
-        cosmos_connection = secret_client.get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8").value
-        client = pymongo.MongoClient(cosmos_connection)
-        db = client.up2d8
+        db = get_db()
 
         # --- Archive processed articles older than 90 days ---
         article_cutoff_date = datetime.now(UTC) - timedelta(days=90)
 
-        result = db.articles.delete_many({
-            "processed": True,
-            "created_at": {"$lt": article_cutoff_date}
-        })
+        with pymongo.timeout(BULK_OPERATION_TIMEOUT_SECONDS):
+            result = db.articles.delete_many({
+                "processed": True,
+                "created_at": {"$lt": article_cutoff_date}
+            })
 
         archived_articles_count = result.deleted_count
         logger.info("Archived old processed articles", count=archived_articles_count)
@@ -48,9 +45,10 @@ def main(timer: func.TimerRequest) -> None:
         # --- Delete old analytics events (keep 180 days) ---
         analytics_cutoff = datetime.now(UTC) - timedelta(days=180)
 
-        analytics_result = db.analytics.delete_many({
-            "timestamp": {"$lt": analytics_cutoff}
-        })
+        with pymongo.timeout(BULK_OPERATION_TIMEOUT_SECONDS):
+            analytics_result = db.analytics.delete_many({
+                "timestamp": {"$lt": analytics_cutoff}
+            })
 
         archived_analytics_count = analytics_result.deleted_count
         logger.info("Archived old analytics events", count=archived_analytics_count)
@@ -3,7 +3,7 @@ import azure.functions as func
 from dotenv import load_dotenv
 from shared.backend_client import BackendAPIClient
 from shared.key_vault_client import get_secret_client
-import pymongo
+from shared.db_client import get_mongo_client
 import structlog
 from shared.logger_config import configure_logger
 
@@ -33,9 +33,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
     # --- Check 1: Cosmos DB Connection ---
     try:
-        secret_client = get_secret_client()
-        cosmos_connection = secret_client.get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8").value
-        client = pymongo.MongoClient(cosmos_connection, serverSelectionTimeoutMS=5000)
+        client = get_mongo_client()
         client.server_info()  # Will raise exception if can't connect
         health_status["checks"]["cosmos_db"] = "connected"
         logger.debug("Cosmos DB health check passed")
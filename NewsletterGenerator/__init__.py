@@ -1,11 +1,18 @@
+import itertools
 import os
-import pymongo
-import google.generativeai as genai
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
 import azure.functions as func
-import markdown # Import the markdown library
+import pymongo
+import pymongo.errors
 from shared.email_service import EmailMessage, SMTPProvider
 from dotenv import load_dotenv
-from shared.key_vault_client import get_secret_client
+from shared.key_vault_client import get_secret
+from shared.db_client import get_db, ensure_article_indexes, BULK_OPERATION_TIMEOUT_SECONDS
+from shared.tags import normalize_tags
 import structlog
 from shared.logger_config import configure_logger
 
@@ -13,6 +20,196 @@ from shared.logger_config import configure_logger
 configure_logger()
 logger = structlog.get_logger()
 
+# Users are processed concurrently; Gemini calls are capped separately to respect model QPS
+USER_MAX_WORKERS = 8
+GEMINI_MAX_CONCURRENCY = 4
+GEMINI_MAX_ATTEMPTS = 3
+# Gemini quotas are per minute, so back off in tens of seconds (with jitter so threads
+# don't retry in lockstep) unless the error says exactly how long to wait
+GEMINI_RETRY_BASE_SECONDS = 10
+GEMINI_RETRY_MAX_SECONDS = 60
+# Upper bound on articles fetched per user, keeping memory flat however large the backlog
+MAX_ARTICLES_PER_USER = 100
+# Only the newest articles go into the Gemini prompt, with summaries truncated, to bound
+# prompt size (and so latency and token cost)
+MAX_PROMPT_ARTICLES = 20
+MAX_PROMPT_SUMMARY_CHARS = 300
+
+class UserOutcome(Enum):
+    SENT = "sent"
+    # Nothing to send, e.g. no articles match the user's tags
+    SKIPPED = "skipped"
+    # Generation, sending or the article query failed; the user should get these articles later
+    FAILED = "failed"
+
+_gemini_semaphore = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+# markdown.Markdown instances are reusable via reset() but not thread-safe, so keep one per thread
+_markdown_local = threading.local()
+
+# Clients are created on first use and reused across warm invocations
+_model = None
+_smtp_provider = None
+
+def _get_model():
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=get_secret("UP2D8-GEMINI-API-Key"))
+        _model = genai.GenerativeModel('gemini-pro')
+    return _model
+
+def _get_smtp_provider() -> SMTPProvider:
+    global _smtp_provider
+    if _smtp_provider is None:
+        _smtp_provider = SMTPProvider(
+            smtp_host=os.environ["BREVO_SMTP_HOST"],
+            smtp_port=int(os.environ["BREVO_SMTP_PORT"]),
+            smtp_username=os.environ["BREVO_SMTP_USER"],
+            smtp_password=get_secret("UP2D8-SMTP-KEY")
+        )
+    return _smtp_provider
+
+def _markdown_to_html(text: str) -> str:
+    md = getattr(_markdown_local, 'md', None)
+    if md is None:
+        import markdown
+
+        md = _markdown_local.md = markdown.Markdown()
+    return md.reset().convert(text)
+
+def _retry_delay_seconds(error) -> float | None:
+    """Return the server-requested retry delay (google.rpc.RetryInfo) carried by an API error, if any."""
+    for detail in getattr(error, 'details', None) or ():
+        if isinstance(detail, dict):
+            retry_delay = detail.get('retryDelay')
+            if isinstance(retry_delay, str) and retry_delay.endswith('s'):
+                try:
+                    return float(retry_delay[:-1])
+                except ValueError:
+                    continue
+        else:
+            retry_delay = getattr(detail, 'retry_delay', None)
+            if retry_delay is not None:
+                return retry_delay.seconds + retry_delay.nanos / 1e9
+    return None
+
+def _retry_backoff_seconds(error, attempt: int) -> float:
+    delay = _retry_delay_seconds(error)
+    if delay is None:
+        delay = GEMINI_RETRY_BASE_SECONDS * 2 ** attempt + random.uniform(0, GEMINI_RETRY_BASE_SECONDS)
+    return min(delay, GEMINI_RETRY_MAX_SECONDS)
+
+def _generate_newsletter(model, prompt: str) -> str:
+    """
+    Call Gemini with bounded concurrency, retrying transient API failures (quota,
+    overload, server errors, timeouts) after the server's requested retry delay, or
+    a jittered exponential backoff when none is given. Anything else, such
+    as an invalid key or a safety-blocked response whose .text raises ValueError,
+    is raised immediately.
+    """
+    from google.api_core import exceptions as google_exceptions
+
+    transient_errors = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        try:
+            with _gemini_semaphore:
+                return model.generate_content(prompt).text
+        except transient_errors as e:
+            if attempt == GEMINI_MAX_ATTEMPTS - 1:
+                raise
+            # Sleep outside the semaphore so waiting retries don't block other users' calls
+            time.sleep(_retry_backoff_seconds(e, attempt))
+
+def _find_user_articles(articles_collection, user_subscribed_tags: list[str]) -> list[dict]:
+    """
+    Fetch up to MAX_ARTICLES_PER_USER unprocessed articles tagged with any of the
+    user's tags, newest first, with only the fields the prompt uses.
+
+    Cosmos DB rejects a sort on a field without an index, so if the created_at index
+    is missing (e.g. the migration has not run) this falls back to an unsorted query
+    rather than failing every user.
+    """
+    query = {'processed': False, 'tags': {'$in': user_subscribed_tags}}
+    projection = {'title': 1, 'summary': 1}
+    try:
+        # Materialised inside the try: the sort error only surfaces on the first batch
+        return list(
+            articles_collection.find(query, projection)
+            .sort('created_at', pymongo.DESCENDING)
+            .limit(MAX_ARTICLES_PER_USER)
+        )
+    except pymongo.errors.OperationFailure as e:
+        logger.warning("Sorted article query failed; falling back to unsorted", error=str(e))
+        return list(articles_collection.find(query, projection).limit(MAX_ARTICLES_PER_USER))
+
+def _process_user(user, articles_collection, run_article_ids, model, smtp_provider, sender_email: str) -> UserOutcome:
+    """
+    Generate and send one user's newsletter, reporting whether it was sent, skipped
+    because there was nothing to send, or failed.
+    """
+    try:
+        user_subscribed_tags = normalize_tags(user.get('subscribed_tags', []))
+        user_preferences = user.get('preferences', 'concise')
+
+        # Filter articles by subscribed tags in Cosmos DB via the tags/processed index.
+        # Articles that arrived after the run started are left for the next run.
+        relevant_articles = []
+        if user_subscribed_tags:
+            relevant_articles = list(itertools.islice(
+                (a for a in _find_user_articles(articles_collection, user_subscribed_tags) if a['_id'] in run_article_ids),
+                MAX_PROMPT_ARTICLES
+            ))
+
+        if not relevant_articles:
+            logger.info("No relevant articles for user", user_email=user['email'], subscribed_tags=user_subscribed_tags)
+            return UserOutcome.SKIPPED
+
+        # Generate newsletter content with Gemini
+        prompt = f"Create a {user_preferences} newsletter in Markdown from these articles:\n\n" + ''.join(
+            f"- **{article['title']}**: {(article.get('summary') or '')[:MAX_PROMPT_SUMMARY_CHARS]}\n"
+            for article in relevant_articles
+        )
+
+        newsletter_content_markdown = ""
+        try:
+            newsletter_content_markdown = _generate_newsletter(model, prompt)
+        except Exception as e:
+            logger.error("Error generating content with Gemini for user", user_email=user['email'], error=str(e))
+            return UserOutcome.FAILED
+
+        if not newsletter_content_markdown:
+            logger.warning("Gemini API returned empty content for user. Skipping email.", user_email=user['email'])
+            return UserOutcome.FAILED
+
+        # Convert Markdown to HTML
+        newsletter_content_html = _markdown_to_html(newsletter_content_markdown)
+
+        # Create and send email
+        email_message = EmailMessage(
+            to=user['email'],
+            subject='Your Daily News Digest',
+            html_body=newsletter_content_html, # Use HTML content
+            from_email=sender_email
+        )
+
+        # SMTPProvider opens its own connection per send, so it is safe to share across threads
+        if smtp_provider.send_email(email_message):
+            logger.info("Newsletter sent", user_email=user['email'])
+            return UserOutcome.SENT
+
+        logger.error("Failed to send newsletter", user_email=user['email'])
+        return UserOutcome.FAILED
+
+    except Exception as e:
+        logger.error("Error processing user", user_email=user.get('email'), error=str(e))
+        return UserOutcome.FAILED
+
 def main(timer: func.TimerRequest) -> None:
     load_dotenv()
     logger.info('Python timer trigger function ran', past_due=timer.past_due)
@@ -20,96 +217,43 @@ def main(timer: func.TimerRequest) -> None:
 
     try:
         # Get configuration from environment variables and Key Vault
-        secret_client = get_secret_client()
-
-        cosmos_db_connection_string = secret_client.get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8").value
-        gemini_api_key = secret_client.get_secret("UP2D8-GEMINI-API-Key").value
-        brevo_smtp_user = os.environ["BREVO_SMTP_USER"]
-        brevo_smtp_password = secret_client.get_secret("UP2D8-SMTP-KEY").value
-        brevo_smtp_host = os.environ["BREVO_SMTP_HOST"]
-        brevo_smtp_port = int(os.environ["BREVO_SMTP_PORT"])
         sender_email = os.environ["SENDER_EMAIL"]
-
-        # Configure Gemini API
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel('gemini-pro')
-
-        # Initialize SMTP Provider
-        smtp_provider = SMTPProvider(
-            smtp_host=brevo_smtp_host,
-            smtp_port=brevo_smtp_port,
-            smtp_username=brevo_smtp_user,
-            smtp_password=brevo_smtp_password
-        )
+        model = _get_model()
+        smtp_provider = _get_smtp_provider()
 
         # Connect to Cosmos DB
-        client = pymongo.MongoClient(cosmos_db_connection_string)
-        db = client.up2d8
+        db = get_db()
         users_collection = db.users
         articles_collection = db.articles
+        ensure_article_indexes()
 
-        # Fetch users and unprocessed articles
-        users = list(users_collection.find())
-        articles = list(articles_collection.find({'processed': False}))
+        # Fetch users, and only the ids of unprocessed articles; each user's articles are queried separately
+        users = list(users_collection.find({}, {'email': 1, 'subscribed_tags': 1, 'preferences': 1}))
+        article_ids = [a['_id'] for a in articles_collection.find({'processed': False}, {'_id': 1})]
 
-        if not articles:
+        if not article_ids:
             logger.info("No new articles to process.")
             return
 
-        sent_newsletters_count = 0
-        for user in users:
-            try:
-                user_subscribed_tags = user.get('subscribed_tags', [])
-                user_preferences = user.get('preferences', 'concise')
-                
-                # Filter articles based on subscribed tags
-                relevant_articles = [a for a in articles if any(tag in a.get('tags', []) for tag in user_subscribed_tags)]
-
-                if not relevant_articles:
-                    logger.info("No relevant articles for user", user_email=user['email'], subscribed_tags=user_subscribed_tags)
-                    continue
+        run_article_ids = frozenset(article_ids)
 
-                # Generate newsletter content with Gemini
-                prompt = f"Create a {user_preferences} newsletter in Markdown from these articles:\n\n"
-                for article in relevant_articles:
-                    prompt += f"- **{article['title']}**: {article['summary']}\n"
-                
-                newsletter_content_markdown = ""
-                try:
-                    response = model.generate_content(prompt)
-                    newsletter_content_markdown = response.text
-                except Exception as e:
-                    logger.error("Error generating content with Gemini for user", user_email=user['email'], error=str(e))
-                    continue # Skip to the next user if Gemini API fails
-
-                if not newsletter_content_markdown:
-                    logger.warning("Gemini API returned empty content for user. Skipping email.", user_email=user['email'])
-                    continue
+        with ThreadPoolExecutor(max_workers=USER_MAX_WORKERS) as executor:
+            results = list(executor.map(
+                lambda user: _process_user(user, articles_collection, run_article_ids, model, smtp_provider, sender_email),
+                users
+            ))
+        sent_newsletters_count = results.count(UserOutcome.SENT)
+        failed_users_count = results.count(UserOutcome.FAILED)
 
-                # Convert Markdown to HTML
-                newsletter_content_html = markdown.markdown(newsletter_content_markdown)
-
-                # Create and send email
-                email_message = EmailMessage(
-                    to=user['email'],
-                    subject='Your Daily News Digest',
-                    html_body=newsletter_content_html, # Use HTML content
-                    from_email=sender_email
-                )
-                
-                # Note: The send_email method in SMTPProvider is not async, so we call it directly.
-                if smtp_provider.send_email(email_message):
-                    sent_newsletters_count += 1
-                    logger.info("Newsletter sent", user_email=user['email'])
-                else:
-                    logger.error("Failed to send newsletter", user_email=user['email'])
-
-            except Exception as e:
-                logger.error("Error processing user", user_email=user['email'], error=str(e))
+        # If users failed and nobody got a newsletter (e.g. Gemini or SMTP is down), keep the
+        # articles unprocessed so the next run can still deliver them
+        if failed_users_count and not sent_newsletters_count:
+            logger.error("No newsletters sent and users failed; leaving articles unprocessed", failed_users=failed_users_count)
+            return
 
         # Mark articles as processed
-        article_ids = [a['_id'] for a in articles]
-        articles_collection.update_many({'_id': {'$in': article_ids}}, {'$set': {'processed': True}})
+        with pymongo.timeout(BULK_OPERATION_TIMEOUT_SECONDS):
+            articles_collection.update_many({'_id': {'$in': article_ids}}, {'$set': {'processed': True}})
 
         logger.info('Sent newsletters', count=sent_newsletters_count)
 
@@ -0,0 +1,99 @@
+import pymongo
+import pymongo.errors
+from pymongo.collection import Collection
+from pymongo.database import Database
+from shared.key_vault_client import get_secret
+import structlog
+
+logger = structlog.get_logger()
+
+# Maximum number of links sent in a single $in lookup
+LINK_LOOKUP_BATCH_SIZE = 1000
+
+# Bulk writes over many documents can outlast the client's 10 s socket timeout on a
+# throttled Cosmos account; wrap them in pymongo.timeout(BULK_OPERATION_TIMEOUT_SECONDS)
+BULK_OPERATION_TIMEOUT_SECONDS = 300
+
+# Indexes on `articles`, in the order they are created
+ARTICLE_INDEXES = [
+    [("link", pymongo.ASCENDING)],
+    [("processed", pymongo.ASCENDING)],
+    [("tags", pymongo.ASCENDING), ("processed", pymongo.ASCENDING)],
+    [("created_at", pymongo.DESCENDING)],
+]
+
+_mongo_client = None
+_db = None
+_article_indexes_ready = False
+
+def get_mongo_client() -> pymongo.MongoClient:
+    """Return the process-wide MongoClient so warm invocations reuse pooled connections."""
+    global _mongo_client
+    if _mongo_client is None:
+        _mongo_client = pymongo.MongoClient(
+            get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8"),
+            maxPoolSize=50,
+            minPoolSize=5,  # Keep a few connections warm between invocations
+            serverSelectionTimeoutMS=5000,
+            socketTimeoutMS=10000,
+            retryWrites=False,  # Not supported by the Cosmos DB Mongo API
+            appname="up2d8-functions"
+        )
+    return _mongo_client
+
+def get_db() -> Database:
+    global _db
+    if _db is None:
+        _db = get_mongo_client().up2d8
+    return _db
+
+def _index_key(key) -> tuple:
+    """Normalise an index key spec so server-reported and requested keys compare equal."""
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in key)
+
+def create_article_indexes(articles_collection: Collection) -> None:
+    """
+    Create the indexes the functions query `articles` by. Run at deploy time by
+    tests/migration.py, and safe to re-run against an existing database.
+
+    Keys that are already indexed are skipped whatever their options, e.g. the
+    unique `link_1` created before these functions managed indexes; asking for it
+    again without `unique` would fail with IndexKeySpecsConflict. New `link`
+    indexes are not unique because Cosmos DB only allows unique indexes on empty
+    collections, and link uniqueness is already enforced by the backend API.
+    Each index is created independently so one failure does not block the rest.
+    """
+    existing_keys = {_index_key(info["key"]) for info in articles_collection.index_information().values()}
+    for key in ARTICLE_INDEXES:
+        if _index_key(key) in existing_keys:
+            continue
+        try:
+            articles_collection.create_index(key)
+        except pymongo.errors.PyMongoError as e:
+            logger.warning("Failed to create article index", key=key, error=str(e))
+
+def ensure_article_indexes() -> None:
+    """
+    Safety net for environments where the migration has not run: checks the
+    article indexes at most once per worker process, so warm invocations skip the
+    round-trip. Indexes that already exist count as ready; individual create
+    failures are logged by create_article_indexes. Only a failure to reach the
+    collection at all is retried on the next call. Never raises.
+    """
+    global _article_indexes_ready
+    if _article_indexes_ready:
+        return
+    try:
+        create_article_indexes(get_db().articles)
+        _article_indexes_ready = True
+    except Exception as e:
+        logger.warning("Failed to ensure article indexes", error=str(e))
+
+def find_existing_links(articles_collection: Collection, links: list[str]) -> set[str]:
+    """Return the subset of links already stored, fetching only the link field in batched $in queries."""
+    existing_links = set()
+    for i in range(0, len(links), LINK_LOOKUP_BATCH_SIZE):
+        batch = links[i:i + LINK_LOOKUP_BATCH_SIZE]
+        cursor = articles_collection.find({"link": {"$in": batch}}, {"link": 1, "_id": 0})
+        existing_links.update(doc["link"] for doc in cursor)
+    return existing_links
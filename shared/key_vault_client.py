@@ -4,6 +4,7 @@ from azure.keyvault.secrets import SecretClient
 from dotenv import load_dotenv
 
 _secret_client = None
+_secrets: dict[str, str] = {}
 
 def get_secret_client() -> SecretClient:
     global _secret_client
@@ -13,3 +14,9 @@ def get_secret_client() -> SecretClient:
         credential = DefaultAzureCredential()
         _secret_client = SecretClient(vault_url=key_vault_uri, credential=credential)
     return _secret_client
+
+def get_secret(name: str) -> str:
+    """Return a Key Vault secret value, cached for the lifetime of the worker process."""
+    if name not in _secrets:
+        _secrets[name] = get_secret_client().get_secret(name).value
+    return _secrets[name]
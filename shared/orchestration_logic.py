@@ -1,11 +1,61 @@
 import os
-import pymongo
-from langchain_community.utilities import GoogleSearchAPIWrapper
-from shared.key_vault_client import get_secret_client
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from shared.key_vault_client import get_secret
+from shared.db_client import get_db, ensure_article_indexes, find_existing_links
 import structlog
 
 logger = structlog.get_logger()
 
+# Topics are searched concurrently, throttled to stay within the Custom Search quota
+SEARCH_MAX_WORKERS = 5
+SEARCH_MAX_QPS = 1.5
+
+# The Google API client behind the wrapper is not thread-safe, so each concurrent
+# search checks out its own wrapper; they are kept for reuse across invocations.
+_search_pool = queue.SimpleQueue()
+_search_rate_lock = threading.Lock()
+_next_search_at = 0.0
+
+def _checkout_search():
+    try:
+        return _search_pool.get_nowait()
+    except queue.Empty:
+        # langchain_community is heavy; only import it when a search actually runs
+        from langchain_community.utilities import GoogleSearchAPIWrapper
+
+        os.environ["GOOGLE_API_KEY"] = get_secret("GOOGLE-CUSTOM-SEARCH-API")
+        return GoogleSearchAPIWrapper()
+
+def _wait_for_search_slot() -> None:
+    """Space search calls at least 1/SEARCH_MAX_QPS seconds apart across all threads."""
+    global _next_search_at
+    with _search_rate_lock:
+        now = time.monotonic()
+        delay = _next_search_at - now
+        _next_search_at = max(now, _next_search_at) + 1 / SEARCH_MAX_QPS
+    if delay > 0:
+        time.sleep(delay)
+
+def _search_one_topic(topic: str) -> set[str]:
+    logger.info("Searching for articles", topic=topic)
+    search = None
+    try:
+        # Building a wrapper can fail (Key Vault, import); keep that to this topic
+        # so the other topics' results are not thrown away
+        search = _checkout_search()
+        _wait_for_search_slot()
+        search_results = search.results(f"latest articles about {topic}", num_results=5)
+        return {res["link"] for res in search_results if res.get("link", "").startswith("http")}
+    except Exception as e:
+        logger.error("Error during search for topic", topic=topic, error=str(e))
+        return set()
+    finally:
+        if search is not None:
+            _search_pool.put(search)
+
 def find_new_articles() -> list[str]:
     """
     Core orchestration logic to find new articles based on user topics.
@@ -13,23 +63,16 @@ def find_new_articles() -> list[str]:
     """
     try:
         # --- 1. Configuration and Database Connection ---
-        secret_client = get_secret_client()
-        
-        cosmos_db_connection_string = secret_client.get_secret("COSMOS-DB-CONNECTION-STRING-UP2D8").value
-        google_api_key = secret_client.get_secret("GOOGLE-CUSTOM-SEARCH-API").value
         google_cse_id = os.getenv("GOOGLE_CSE_ID")
 
         if not google_cse_id:
             logger.warning("GOOGLE_CSE_ID is not set. Orchestration cannot run.")
             return []
 
-        os.environ["GOOGLE_API_KEY"] = google_api_key
-        os.environ["GOOGLE_CSE_ID"] = google_cse_id
-
-        client = pymongo.MongoClient(cosmos_db_connection_string)
-        db = client.up2d8
+        db = get_db()
         users_collection = db.users
         articles_collection = db.articles
+        ensure_article_indexes()
 
         # --- 2. Fetch User Topics ---
         all_topics = set()
@@ -44,18 +87,11 @@ def find_new_articles() -> list[str]:
         logger.info("Found unique user topics", topics=list(all_topics))
 
         # --- 3. Search for Articles ---
-        search = GoogleSearchAPIWrapper()
         all_found_urls = set()
 
-        for topic in all_topics:
-            logger.info("Searching for articles", topic=topic)
-            try:
-                search_results = search.results(f"latest articles about {topic}", num_results=5)
-                for res in search_results:
-                    if "link" in res:
-                        all_found_urls.add(res["link"])
-            except Exception as e:
-                logger.error("Error during search for topic", topic=topic, error=str(e))
+        with ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS) as executor:
+            for topic_urls in executor.map(_search_one_topic, all_topics):
+                all_found_urls.update(topic_urls)
 
         if not all_found_urls:
             logger.warning("Search did not return any URLs.")
@@ -64,7 +100,7 @@ def find_new_articles() -> list[str]:
         logger.info("Found total URLs from search", count=len(all_found_urls))
 
         # --- 4. Deduplicate against existing articles ---
-        existing_links = {article["link"] for article in articles_collection.find({"link": {"$in": list(all_found_urls)}}, {"link": 1})}
+        existing_links = find_existing_links(articles_collection, list(all_found_urls))
         
         logger.info("Found existing articles in DB", count=len(existing_links))
 
@@ -0,0 +1,42 @@
+import re
+
+# Define a simple keyword-based tagging system
+TAG_KEYWORDS = {
+    "AI": ["ai", "artificial intelligence", "machine learning", "deep learning", "neural network"],
+    "Tech": ["technology", "software", "hardware", "startup", "innovation"],
+    "Science": ["science", "research", "discovery", "biology", "physics", "chemistry"],
+    "Business": ["business", "economy", "finance", "market", "investment"],
+    "Health": ["health", "medical", "medicine", "wellness", "fitness"],
+    "Environment": ["environment", "climate", "sustainability", "ecology"],
+}
+
+# Keywords this short are only matched as whole words, so "ai" does not match "said"
+# or "email". Longer keywords match anywhere, as plain substring checks did, so
+# "Healthcare", "Researchers", "Neuroscience" and "Marketing" are still tagged.
+SHORT_KEYWORD_MAX_LENGTH = 3
+
+def _keyword_pattern(keyword: str) -> str:
+    if len(keyword) <= SHORT_KEYWORD_MAX_LENGTH:
+        return r"\b" + re.escape(keyword) + r"\b"
+    return re.escape(keyword)
+
+# One case-insensitive alternation per tag, compiled once at import
+_TAG_PATTERNS = {
+    tag: re.compile("|".join(_keyword_pattern(k) for k in keywords), re.IGNORECASE)
+    for tag, keywords in TAG_KEYWORDS.items()
+}
+
+def assign_tags(title: str, summary: str) -> list[str]:
+    return [
+        tag for tag, pattern in _TAG_PATTERNS.items()
+        if pattern.search(title) or pattern.search(summary)
+    ]
+
+_CANONICAL_TAGS = {tag.lower(): tag for tag in TAG_KEYWORDS}
+
+def normalize_tags(tags: list[str]) -> list[str]:
+    """
+    Map tags onto the canonical casing stored on articles (e.g. "ai" -> "AI") so they
+    can be matched with an exact, indexed $in query. Unknown tags are kept as given.
+    """
+    return list({_CANONICAL_TAGS.get(tag.strip().lower(), tag) for tag in tags})
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from shared.key_vault_client import get_secret_client
+from shared.db_client import create_article_indexes
 
 def run_migration():
     load_dotenv()
@@ -53,6 +54,11 @@ def run_migration():
         })
         print("'articles' collection migration complete.")
 
+        # Create indexes once at deploy time instead of from the functions' hot path
+        print("\n--- Creating 'articles' indexes ---")
+        create_article_indexes(articles_collection)
+        print("'articles' indexes created.")
+
         print("\nDatabase migration finished successfully.")
 
     except Exception as e:
@@ -0,0 +1,21 @@
+import os
+import sys
+import itertools
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from CrawlerWorker import _iter_nonempty_lines
+
+def test_iter_nonempty_lines_skips_blank_and_whitespace_only_lines():
+    text = "\n  Headline  \n\n \t \nFirst paragraph\r\n\nLast line"
+    assert list(_iter_nonempty_lines(text)) == ["Headline", "First paragraph", "Last line"]
+
+def test_iter_nonempty_lines_handles_empty_and_trailing_newlines():
+    assert list(_iter_nonempty_lines("")) == []
+    assert list(_iter_nonempty_lines("\n\n")) == []
+    assert list(_iter_nonempty_lines("only\n")) == ["only"]
+
+def test_iter_nonempty_lines_is_lazy():
+    lines = _iter_nonempty_lines("a\nb\n" + "c\n" * 100_000)
+    assert list(itertools.islice(lines, 2)) == ["a", "b"]
@@ -0,0 +1,112 @@
+import os
+import sys
+import pymongo
+from pymongo.errors import OperationFailure
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared import db_client
+
+class FakeArticlesCollection:
+    """Minimal stand-in for a pymongo Collection that enforces index option conflicts like the server."""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.created = []
+        self.index_information_calls = 0
+
+    def index_information(self):
+        self.index_information_calls += 1
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    def create_index(self, keys, **kwargs):
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        existing = self.indexes.get(name)
+        if existing and existing.get("unique", False) != kwargs.get("unique", False):
+            raise OperationFailure(f"Index already exists with different options: {name}", code=86)
+        self.indexes[name] = {"key": list(keys), **kwargs}
+        self.created.append(keys)
+        return name
+
+class FakeDatabase:
+    def __init__(self, articles):
+        self.articles = articles
+
+def existing_database_indexes():
+    return {
+        "_id_": {"key": [("_id", 1)]},
+        "link_1": {"key": [("link", 1)], "unique": True},
+    }
+
+def test_create_article_indexes_skips_existing_unique_link_index():
+    articles = FakeArticlesCollection(existing_database_indexes())
+
+    db_client.create_article_indexes(articles)
+
+    assert articles.indexes["link_1"]["unique"] is True
+    assert articles.created == [
+        [("processed", pymongo.ASCENDING)],
+        [("tags", pymongo.ASCENDING), ("processed", pymongo.ASCENDING)],
+        [("created_at", pymongo.DESCENDING)],
+    ]
+
+def test_create_article_indexes_is_idempotent():
+    articles = FakeArticlesCollection(existing_database_indexes())
+
+    db_client.create_article_indexes(articles)
+    db_client.create_article_indexes(articles)
+
+    assert len(articles.created) == len(db_client.ARTICLE_INDEXES) - 1
+
+def test_create_article_indexes_continues_past_a_failing_index():
+    articles = FakeArticlesCollection({})
+    create_index = articles.create_index
+
+    def failing_create_index(keys, **kwargs):
+        if keys == [("processed", pymongo.ASCENDING)]:
+            raise OperationFailure("throttled", code=16500)
+        return create_index(keys, **kwargs)
+
+    articles.create_index = failing_create_index
+    db_client.create_article_indexes(articles)
+
+    assert [("created_at", pymongo.DESCENDING)] in articles.created
+    assert [("processed", pymongo.ASCENDING)] not in articles.created
+
+def test_ensure_article_indexes_runs_once_against_existing_database(monkeypatch):
+    articles = FakeArticlesCollection(existing_database_indexes())
+    monkeypatch.setattr(db_client, "get_db", lambda: FakeDatabase(articles))
+    monkeypatch.setattr(db_client, "_article_indexes_ready", False)
+
+    db_client.ensure_article_indexes()
+    db_client.ensure_article_indexes()
+
+    assert db_client._article_indexes_ready is True
+    assert articles.index_information_calls == 1
+
+class FakeLinkCollection:
+    """Records each find() call and answers from a fixed set of stored links."""
+
+    def __init__(self, stored_links):
+        self.stored_links = set(stored_links)
+        self.queries = []
+
+    def find(self, filter, projection):
+        self.queries.append((filter, projection))
+        return [{"link": link} for link in filter["link"]["$in"] if link in self.stored_links]
+
+def test_find_existing_links_splits_lookup_into_batches():
+    links = [f"https://example.com/{i}" for i in range(2500)]
+    articles = FakeLinkCollection(links[999:1001] + links[-1:])
+
+    existing = db_client.find_existing_links(articles, links)
+
+    assert existing == {links[999], links[1000], links[-1]}
+    assert [len(query["link"]["$in"]) for query, _ in articles.queries] == [1000, 1000, 500]
+    assert all(projection == {"link": 1, "_id": 0} for _, projection in articles.queries)
+
+def test_find_existing_links_skips_query_for_no_links():
+    articles = FakeLinkCollection([])
+    assert db_client.find_existing_links(articles, []) == set()
+    assert articles.queries == []
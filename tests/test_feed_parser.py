@@ -0,0 +1,43 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared import feed_parser
+from shared.feed_parser import MIN_FEEDS_FOR_PROCESSES, feed_parse_executor, parse_feed
+
+# Latin-1 body whose XML declaration has no encoding; only the HTTP header declares it
+LATIN1_FEED = (
+    '<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+    '<item><title>Caf\xe9 opens</title><link>https://example.com/cafe</link>'
+    '<description>News</description><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>'
+    '</channel></rss>'
+).encode('latin-1')
+
+def test_parse_feed_uses_response_header_charset():
+    feed = parse_feed(LATIN1_FEED, {'content-type': 'application/rss+xml; charset=iso-8859-1'})
+    assert feed['bozo_exception'] is None
+    assert feed['entries'] == [{
+        'title': 'Caf\xe9 opens',
+        'link': 'https://example.com/cafe',
+        'summary': 'News',
+        'published': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    }]
+
+def test_parse_feed_without_headers_flags_misdeclared_encoding():
+    feed = parse_feed(LATIN1_FEED)
+    assert feed['bozo_exception'] is not None
+
+def test_feed_parse_executor_uses_processes_only_for_enough_feeds(monkeypatch):
+    monkeypatch.setattr(feed_parser, '_available_cpus', lambda: 4)
+    with feed_parse_executor(MIN_FEEDS_FOR_PROCESSES - 1) as executor:
+        assert isinstance(executor, ThreadPoolExecutor)
+    with feed_parse_executor(MIN_FEEDS_FOR_PROCESSES) as executor:
+        assert isinstance(executor, ProcessPoolExecutor)
+
+def test_feed_parse_executor_stays_in_process_on_one_cpu(monkeypatch):
+    monkeypatch.setattr(feed_parser, '_available_cpus', lambda: 1)
+    with feed_parse_executor(MIN_FEEDS_FOR_PROCESSES * 2) as executor:
+        assert isinstance(executor, ThreadPoolExecutor)
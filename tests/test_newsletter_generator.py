@@ -0,0 +1,188 @@
+import os
+import sys
+import pytest
+from google.api_core import exceptions as google_exceptions
+from pymongo.errors import OperationFailure
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import NewsletterGenerator
+
+class FakeResponse:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("Response was blocked")
+        return self._text
+
+class FakeModel:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(NewsletterGenerator.time, "sleep", lambda seconds: None)
+
+def test_generate_newsletter_retries_transient_errors():
+    model = FakeModel([google_exceptions.ServiceUnavailable("overloaded"), "# Digest"])
+    assert NewsletterGenerator._generate_newsletter(model, "prompt") == "# Digest"
+    assert model.calls == 2
+
+def test_generate_newsletter_gives_up_after_max_attempts():
+    model = FakeModel([google_exceptions.ResourceExhausted("quota")] * NewsletterGenerator.GEMINI_MAX_ATTEMPTS)
+    with pytest.raises(google_exceptions.ResourceExhausted):
+        NewsletterGenerator._generate_newsletter(model, "prompt")
+    assert model.calls == NewsletterGenerator.GEMINI_MAX_ATTEMPTS
+
+@pytest.mark.parametrize("outcome, error", [
+    (None, ValueError),
+    (google_exceptions.PermissionDenied("invalid API key"), google_exceptions.PermissionDenied),
+])
+def test_generate_newsletter_does_not_retry_permanent_errors(outcome, error):
+    model = FakeModel([outcome, "# Digest"])
+    with pytest.raises(error):
+        NewsletterGenerator._generate_newsletter(model, "prompt")
+    assert model.calls == 1
+
+class FakeCursor:
+    def __init__(self, docs, sort_error=None):
+        self.docs = docs
+        self.sort_error = sort_error
+        self.sorted = False
+
+    def sort(self, key, direction):
+        self.sorted = True
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def __iter__(self):
+        if self.sorted and self.sort_error:
+            raise self.sort_error
+        return iter(self.docs)
+
+class FakeArticlesCollection:
+    def __init__(self, docs, sort_error=None, unprocessed_ids=()):
+        self.docs = docs
+        self.sort_error = sort_error
+        self.unprocessed_ids = list(unprocessed_ids)
+        self.updates = []
+
+    def find(self, query, projection):
+        if projection == {'_id': 1}:
+            return [{'_id': article_id} for article_id in self.unprocessed_ids]
+        return FakeCursor(list(self.docs), self.sort_error)
+
+    def update_many(self, query, update):
+        self.updates.append((query, update))
+
+class FakeUsersCollection:
+    def __init__(self, users):
+        self.users = users
+
+    def find(self, query, projection):
+        return list(self.users)
+
+class FakeDatabase:
+    def __init__(self, users, articles):
+        self.users = users
+        self.articles = articles
+
+class FakeTimer:
+    past_due = False
+
+UNSORTABLE = OperationFailure("The index path corresponding to the specified order-by item is excluded.", code=2)
+
+def test_find_user_articles_falls_back_to_unsorted_query_when_sort_is_rejected():
+    docs = [{'_id': 1, 'title': 'A', 'summary': 's'}]
+    articles = FakeArticlesCollection(docs, sort_error=UNSORTABLE)
+    assert NewsletterGenerator._find_user_articles(articles, ['AI']) == docs
+
+@pytest.fixture
+def run_main(monkeypatch):
+    def run(articles, users, model=None):
+        monkeypatch.setenv("SENDER_EMAIL", "news@example.com")
+        monkeypatch.setattr(NewsletterGenerator, "get_db", lambda: FakeDatabase(users, articles))
+        monkeypatch.setattr(NewsletterGenerator, "ensure_article_indexes", lambda: None)
+        monkeypatch.setattr(NewsletterGenerator, "_get_model", lambda: model or FakeModel([]))
+        monkeypatch.setattr(NewsletterGenerator, "_get_smtp_provider", lambda: None)
+        NewsletterGenerator.main(FakeTimer())
+    return run
+
+def test_main_leaves_articles_unprocessed_when_every_user_fails(monkeypatch, run_main):
+    articles = FakeArticlesCollection([], unprocessed_ids=[1, 2])
+    users = FakeUsersCollection([{'email': 'a@example.com', 'subscribed_tags': ['AI']}])
+
+    def failing_find_user_articles(*args):
+        raise RuntimeError("Cosmos unavailable")
+
+    monkeypatch.setattr(NewsletterGenerator, "_find_user_articles", failing_find_user_articles)
+
+    run_main(articles, users)
+
+    assert articles.updates == []
+
+def test_main_leaves_articles_unprocessed_when_gemini_fails_for_every_user(run_main):
+    docs = [{'_id': 1, 'title': 'AI news', 'summary': 'Summary', 'tags': ['AI']}]
+    articles = FakeArticlesCollection(docs, unprocessed_ids=[1, 2])
+    users = FakeUsersCollection([
+        {'email': 'a@example.com', 'subscribed_tags': ['AI']},
+        {'email': 'b@example.com', 'subscribed_tags': ['AI']},
+    ])
+    model = FakeModel([google_exceptions.PermissionDenied("invalid API key")] * 2)
+
+    run_main(articles, users, model)
+
+    assert model.calls == 2
+    assert articles.updates == []
+
+def test_main_marks_articles_processed_when_users_are_handled(run_main):
+    articles = FakeArticlesCollection([], unprocessed_ids=[1, 2])
+    users = FakeUsersCollection([{'email': 'a@example.com', 'subscribed_tags': ['AI']}])
+
+    run_main(articles, users)
+
+    assert articles.updates == [({'_id': {'$in': [1, 2]}}, {'$set': {'processed': True}})]
+
+class FakeDuration:
+    def __init__(self, seconds, nanos=0):
+        self.seconds = seconds
+        self.nanos = nanos
+
+class FakeRetryInfo:
+    def __init__(self, retry_delay):
+        self.retry_delay = retry_delay
+
+def test_generate_newsletter_honours_server_retry_delay(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(NewsletterGenerator.time, "sleep", sleeps.append)
+    quota_error = google_exceptions.ResourceExhausted("quota", details=[FakeRetryInfo(FakeDuration(37, 500_000_000))])
+    model = FakeModel([quota_error, "# Digest"])
+
+    assert NewsletterGenerator._generate_newsletter(model, "prompt") == "# Digest"
+    assert sleeps == [37.5]
+
+def test_retry_backoff_reads_rest_style_retry_delay():
+    error = google_exceptions.ResourceExhausted("quota", details=[{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "12s"}])
+    assert NewsletterGenerator._retry_backoff_seconds(error, 0) == 12.0
+
+def test_retry_backoff_without_hint_is_jittered_and_capped():
+    error = google_exceptions.ServiceUnavailable("overloaded")
+    base = NewsletterGenerator.GEMINI_RETRY_BASE_SECONDS
+    first = NewsletterGenerator._retry_backoff_seconds(error, 0)
+    assert base <= first <= 2 * base
+    assert NewsletterGenerator._retry_backoff_seconds(error, 10) == NewsletterGenerator.GEMINI_RETRY_MAX_SECONDS
@@ -0,0 +1,34 @@
+import os
+import queue
+import sys
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared import orchestration_logic
+
+class FakeSearch:
+    def results(self, query, num_results):
+        return [{"link": "https://example.com/article"}, {"Result": "No good Google Search Result was found"}]
+
+def test_search_one_topic_contains_wrapper_build_failures(monkeypatch):
+    def failing_checkout():
+        raise RuntimeError("Key Vault unavailable")
+
+    pool = queue.SimpleQueue()
+    monkeypatch.setattr(orchestration_logic, "_checkout_search", failing_checkout)
+    monkeypatch.setattr(orchestration_logic, "_search_pool", pool)
+
+    assert orchestration_logic._search_one_topic("ai") == set()
+    assert pool.empty()
+
+def test_search_one_topic_returns_http_links_and_recycles_wrapper(monkeypatch):
+    search = FakeSearch()
+    pool = queue.SimpleQueue()
+    monkeypatch.setattr(orchestration_logic, "_checkout_search", lambda: search)
+    monkeypatch.setattr(orchestration_logic, "_wait_for_search_slot", lambda: None)
+    monkeypatch.setattr(orchestration_logic, "_search_pool", pool)
+
+    assert orchestration_logic._search_one_topic("ai") == {"https://example.com/article"}
+    assert pool.get_nowait() is search
+    assert pool.empty()
@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+
+# Add the project root to sys.path to enable module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared.tags import assign_tags, normalize_tags
+
+@pytest.mark.parametrize("title, expected_tag", [
+    ("Healthcare costs rise again", "Health"),
+    ("Researchers map the ocean floor", "Science"),
+    ("Advances in neuroscience", "Science"),
+    ("Marketing budgets shrink", "Business"),
+    ("Markets rally on rate cut", "Business"),
+    ("Startups raise record funding", "Tech"),
+    ("New AI model released", "AI"),
+    ("Neural networks explained", "AI"),
+])
+def test_assign_tags_matches_keyword_variants(title, expected_tag):
+    assert expected_tag in assign_tags(title, "")
+
+def test_assign_tags_short_keywords_need_whole_words():
+    assert "AI" not in assign_tags("The mayor said no", "Check your email and be certain")
+
+def test_assign_tags_is_case_insensitive_and_searches_summary():
+    assert assign_tags("Weekly roundup", "CLIMATE policy and MACHINE LEARNING") == ["AI", "Environment"]
+
+def test_assign_tags_returns_empty_list_without_matches():
+    assert assign_tags("Local bake sale", "Cakes and cookies") == []
+
+def test_normalize_tags_maps_to_canonical_casing():
+    assert sorted(normalize_tags(["ai", " TECH ", "environment"])) == ["AI", "Environment", "Tech"]
+
+def test_normalize_tags_passes_unknown_tags_through():
+    assert sorted(normalize_tags(["Sports", "ai"])) == ["AI", "Sports"]
+
+def test_normalize_tags_removes_duplicates_after_folding():
+    assert normalize_tags(["AI", "ai", "Ai"]) == ["AI"]
+
+def test_normalize_tags_handles_no_tags():
+    assert normalize_tags([]) == []